@@ -4,24 +4,20 @@ import os
 from enum import Enum
 from typing import Optional
 
-from pydantic_settings import BaseSettings
-from starlette.config import Config
+from pydantic import computed_field
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 current_file_dir = os.path.dirname(os.path.realpath(__file__))
 
 # Check the environment and choose the appropriate .env file
 env_mode = os.getenv("ENVIRONMENT", "default")
+env_path: Optional[str]
 if env_mode == "test":
-    env_path = os.path.join(current_file_dir, "../../.env.test")
-    try:
-        config = Config(env_path)
-    except Exception:
-        config = Config()
+    env_path = os.path.join(current_file_dir, "../.env.test")
 elif env_mode == "production":
-    config = Config()  # Do not specify env_path in production
+    env_path = None  # Do not specify env_path in production
 else:
     env_path = os.path.join(current_file_dir, "../.env")
-    config = Config(env_path)
 
 
 class EnvironmentOption(Enum):
@@ -33,56 +29,62 @@ class EnvironmentOption(Enum):
 
 class AppSettings(BaseSettings):
     """Application-specific settings."""
-    APP_NAME: str = config("APP_NAME", default="FastAPI Render Boilerplate")
-    APP_DESCRIPTION: str = config("APP_DESCRIPTION", default="Production-ready FastAPI app with Firecrawl and Gemini")
-    APP_VERSION: str = config("APP_VERSION", default="1.0.0")
-    APP_LOGFILE: str = config("APP_LOGFILE", default="app.log")
+    APP_NAME: str = "FastAPI Render Boilerplate"
+    APP_DESCRIPTION: str = "Production-ready FastAPI app with Firecrawl and Gemini"
+    APP_VERSION: str = "1.0.0"
+    APP_LOGFILE: str = "app.log"
     
     # API Configuration
     API_PATH: str = "/api/v1"
     
     # External API Keys
-    FIRECRAWL_API_KEY: Optional[str] = config("FIRECRAWL_API_KEY", default=None)
-    GEMINI_API_KEY: Optional[str] = config("GEMINI_API_KEY", default=None)
+    FIRECRAWL_API_KEY: Optional[str] = None
+    GEMINI_API_KEY: Optional[str] = None
     
     # Server Configuration
-    HOST: str = config("HOST", default="0.0.0.0")
-    PORT: int = config("PORT", default=8000)
-    DEBUG: bool = config("DEBUG", default=False)
-    LOG_LEVEL: str = config("LOG_LEVEL", default="INFO")
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    DEBUG: bool = False
+    LOG_LEVEL: str = "INFO"
     
     # CORS Configuration
-    FRONTEND_URL: Optional[str] = config("FRONTEND_URL", default=None)
+    FRONTEND_URL: Optional[str] = None
     
     # Timeouts and Limits
-    SCREENSHOT_TIMEOUT_SEC: int = config("SCREENSHOT_TIMEOUT_SEC", default=120)
-    SCRAPE_TIMEOUT_SEC: int = config("SCRAPE_TIMEOUT_SEC", default=60)
+    SCREENSHOT_TIMEOUT_SEC: int = 120
+    SCRAPE_TIMEOUT_SEC: int = 60
+    FIRECRAWL_MAX_CONCURRENCY: int = 8
+    SCRAPE_CACHE_TTL_SEC: int = 6 * 60 * 60
     
     # Worker Configuration
-    WORKER_DEFAULT_MAX_RETRIES: int = config("WORKER_DEFAULT_MAX_RETRIES", default=3)
+    WORKER_DEFAULT_MAX_RETRIES: int = 3
 
 
 
 
 class RedisSettings(BaseSettings):
     """Redis configuration settings."""
-    REDIS_HOST: str = config("REDIS_HOST", default="redis")
-    REDIS_PORT: int = config("REDIS_PORT", default=6379)
-    REDIS_DB: int = config("REDIS_DB", default=0)
-    REDIS_URL: str = f"redis://{config('REDIS_HOST', default='redis')}:{config('REDIS_PORT', default=6379)}/{config('REDIS_DB', default=0)}"
+    REDIS_HOST: str = "redis"
+    REDIS_PORT: int = 6379
+    REDIS_DB: int = 0
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def REDIS_URL(self) -> str:
+        return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_DB}"
 
 
 class SecuritySettings(BaseSettings):
     """Security and authentication settings."""
-    SECRET_KEY: str = config("SECRET_KEY", default="your-secret-key-change-in-production")
-    ALGORITHM: str = config("ALGORITHM", default="HS256")
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = config("ACCESS_TOKEN_EXPIRE_MINUTES", default=30)
-    REFRESH_TOKEN_EXPIRE_DAYS: int = config("REFRESH_TOKEN_EXPIRE_DAYS", default=7)
+    SECRET_KEY: str = "your-secret-key-change-in-production"
+    ALGORITHM: str = "HS256"
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
 
 class EnvironmentSettings(BaseSettings):
     """Environment-specific settings."""
-    ENVIRONMENT: str = config("ENVIRONMENT", default="local")
+    ENVIRONMENT: str = "local"
 
 
 class Settings(
@@ -93,7 +95,7 @@ class Settings(
     EnvironmentSettings,
 ):
     """Combined application settings."""
-    pass
+    model_config = SettingsConfigDict(env_file=env_path, extra="ignore")
 
 
 # Global settings instance
@@ -1,10 +1,21 @@
 """Firecrawl integration for web scraping and screenshot functionality."""
 
-from typing import Any, Dict, List, Literal, Optional, Union, overload
+import asyncio
+import hashlib
+import time
+from typing import Any, Dict, List, Literal, Mapping, Optional, Tuple, TypedDict, Union, overload
 
 import httpx
+import orjson
 from pydantic import BaseModel
-from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_fixed
+from tenacity import (
+    retry,
+    retry_if_exception,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+    wait_random,
+)
 
 from app.config import settings
 from app.logger import get_logger
@@ -15,6 +26,51 @@ FIRECRAWL_BASE_URL = "https://api.firecrawl.dev/"
 FIRECRAWL_PAGE_TIMEOUT_MSEC = 60_000
 SCRAPE_TIMEOUT = httpx.Timeout(30)
 SCRAPE_ATTEMPTS = 3
+FIRECRAWL_MAX_CONNECTIONS = 32
+BATCH_POLL_INTERVAL_SEC = 2
+
+# Shared client, opened in the app lifespan so connections (and TLS sessions)
+# are reused across every scrape/screenshot call.
+_client: Optional[httpx.AsyncClient] = None
+
+# Caps in-flight Firecrawl requests across all extractors so the fan-out in
+# get_daily_holdings doesn't trip the per-key rate limit.
+_FIRECRAWL_SEM = asyncio.Semaphore(settings.FIRECRAWL_MAX_CONCURRENCY)
+
+# Successful Firecrawl responses keyed by request, so repeat calls within the
+# TTL (holdings only change once per trading day) skip the API entirely.
+_response_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_response_cache_lock = asyncio.Lock()
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared Firecrawl client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=FIRECRAWL_BASE_URL,
+            http2=True,
+            timeout=SCRAPE_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=FIRECRAWL_MAX_CONNECTIONS,
+                max_keepalive_connections=FIRECRAWL_MAX_CONNECTIONS,
+            ),
+            headers={"Authorization": f"Bearer {settings.FIRECRAWL_API_KEY}"},
+        )
+    return _client
+
+
+async def startup() -> None:
+    """Open the shared Firecrawl client."""
+    _get_client()
+
+
+async def shutdown() -> None:
+    """Close the shared Firecrawl client."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
 
 
 # In your models/schemas file
@@ -57,6 +113,16 @@ class FirecrawlResponseFormatError(Exception):
     pass
 
 
+class TransientFirecrawlError(FirecrawlResponseFormatError):
+    """Raised for response problems that may clear up on retry (e.g. empty content)."""
+    pass
+
+
+class PermanentFirecrawlError(FirecrawlResponseFormatError):
+    """Raised for response problems a retry won't fix (e.g. missing keys, bad URLs)."""
+    pass
+
+
 class ScrapeResult(BaseModel):
     """Result of a scrape operation."""
     url: str
@@ -64,51 +130,134 @@ class ScrapeResult(BaseModel):
     content: str
 
 
-def default_scrape_payload() -> Dict[str, Any]:
-    """Get default payload for scrape requests."""
-    return {
-        "timeout": FIRECRAWL_PAGE_TIMEOUT_MSEC,
-        "onlyMainContent": False,
-        "skipTlsVerification": True
-    }
+class ScrapePayload(TypedDict, total=False):
+    """Request body for Firecrawl's v1/scrape endpoint."""
+    url: str
+    formats: List[str]
+    onlyMainContent: bool
+    timeout: int
+    skipTlsVerification: bool
+    actions: List[Dict[str, Any]]
+
+
+# Default fields for scrape requests, merged into each payload
+_DEFAULTS: ScrapePayload = {
+    "timeout": FIRECRAWL_PAGE_TIMEOUT_MSEC,
+    "onlyMainContent": False,
+    "skipTlsVerification": True,
+}
+
 
+def _cache_key(path: str, payload: Mapping[str, Any]) -> str:
+    """Build a stable cache key for a Firecrawl request."""
+    raw = orjson.dumps([path, payload], option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(raw).hexdigest()
 
+
+async def discard_cached(path: str, payload: Mapping[str, Any]) -> None:
+    """Drop the cached response for a single request, if any."""
+    async with _response_cache_lock:
+        _response_cache.pop(_cache_key(path, payload), None)
+
+
+async def clear_cache() -> None:
+    """Drop all cached Firecrawl responses."""
+    async with _response_cache_lock:
+        _response_cache.clear()
+
+
+def _prune_expired_locked(now: float) -> None:
+    """Drop expired responses; caller must hold ``_response_cache_lock``."""
+    ttl = settings.SCRAPE_CACHE_TTL_SEC
+    for key, (cached_at, _) in list(_response_cache.items()):
+        if now - cached_at >= ttl:
+            del _response_cache[key]
+
+
+async def call_firecrawl(path: str, payload: Mapping[str, Any]) -> Dict[str, Any]:
+    """Make a call to the Firecrawl API, serving repeats from the TTL cache."""
+    ttl = settings.SCRAPE_CACHE_TTL_SEC
+    if ttl <= 0:
+        return await _post_firecrawl(path, payload)
+
+    key = _cache_key(path, payload)
+    async with _response_cache_lock:
+        cached = _response_cache.get(key)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        logger.debug("Firecrawl cache hit for %s", payload.get("url"))
+        return cached[1]
+
+    data = await _post_firecrawl(path, payload)
+
+    # Only keep responses Firecrawl reported as successful.
+    if data.get("success") and data.get("data"):
+        now = time.monotonic()
+        async with _response_cache_lock:
+            _prune_expired_locked(now)
+            _response_cache[key] = (now, data)
+    return data
+
+
+def _is_retryable_http_error(exc: BaseException) -> bool:
+    """Transport failures, rate limits and server errors; not 4xx client errors."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+# The only retry layer for transport failures; callers should not wrap
+# call_firecrawl (or the extractors built on it) in further HTTP retries.
 @retry(
-    retry=retry_if_exception_type((httpx.HTTPError, FirecrawlResponseFormatError)),
+    retry=retry_if_exception(_is_retryable_http_error),
     stop=stop_after_attempt(SCRAPE_ATTEMPTS),
-    wait=wait_fixed(2),
+    wait=wait_exponential(multiplier=0.5, min=1, max=8) + wait_random(0, 1),
     reraise=True,
 )
-async def call_firecrawl(path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-    """Make a call to the Firecrawl API."""
-    api_url = FIRECRAWL_BASE_URL + path
-    headers = {
-        "Authorization": f"Bearer {settings.FIRECRAWL_API_KEY}",
-        "Content-Type": "application/json",
-    }
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.post(
-                api_url,
-                headers=headers,
-                json=payload,
-                timeout=SCRAPE_TIMEOUT,
+async def _post_firecrawl(path: str, payload: Mapping[str, Any]) -> Dict[str, Any]:
+    """POST a request to the Firecrawl API."""
+    try:
+        async with _FIRECRAWL_SEM:
+            resp = await _get_client().post(
+                path,
+                content=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"},
             )
-            resp.raise_for_status()
-            return resp.json()
-        except httpx.HTTPError as e:
-            logger.error(f"HTTP error occurred while calling Firecrawl API: {e}")
-            raise
-        except Exception as e:
-            logger.error(f"Unexpected error occurred while calling Firecrawl API: {e}")
-            raise
+        resp.raise_for_status()
+        data: Dict[str, Any] = orjson.loads(resp.content)
+        return data
+    except httpx.HTTPError as e:
+        logger.error("HTTP error occurred while calling Firecrawl API: %s", e)
+        raise
+    except Exception as e:
+        logger.error("Unexpected error occurred while calling Firecrawl API: %s", e)
+        raise
 
 
 @retry(
-    retry=retry_if_exception_type(FirecrawlResponseFormatError),
+    retry=retry_if_exception(_is_retryable_http_error),
+    stop=stop_after_attempt(SCRAPE_ATTEMPTS),
+    wait=wait_exponential(multiplier=0.5, min=1, max=8) + wait_random(0, 1),
+    reraise=True,
+)
+async def _get_firecrawl(path: str) -> Dict[str, Any]:
+    """GET a Firecrawl API path (or absolute pagination URL)."""
+    try:
+        async with _FIRECRAWL_SEM:
+            resp = await _get_client().get(path)
+        resp.raise_for_status()
+        data: Dict[str, Any] = orjson.loads(resp.content)
+        return data
+    except httpx.HTTPError as e:
+        logger.error("HTTP error occurred while calling Firecrawl API: %s", e)
+        raise
+
+
+@retry(
+    retry=retry_if_exception_type(TransientFirecrawlError),
     reraise=True,
     stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=1, max=4) + wait_random(0, 1),
 )
 async def scrape(
     url: str,
@@ -117,28 +266,31 @@ async def scrape(
     only_main_content: bool = False,
 ) -> ScrapeResult:
     """Scrape a URL and return the content."""
-    logger.info(f"Scraping URL: {url}")
+    logger.info("Scraping URL: %s", url)
     
-    data = await call_firecrawl(
-        "v1/scrape",
-        {
-            **default_scrape_payload(),
-            "url": url,
-            "formats": [response_format],
-            "onlyMainContent": only_main_content,
-        },
-    )
+    payload: ScrapePayload = {
+        **_DEFAULTS,
+        "url": url,
+        "formats": [response_format],
+        "onlyMainContent": only_main_content,
+    }
+    data = await call_firecrawl("v1/scrape", payload)
     
     try:
-        response_url = data["data"]["metadata"]["sourceURL"]
-        title = data["data"]["metadata"].get("title")
-        content = data["data"][response_format]
-    except KeyError as e:
-        logger.error(f"Malformed response from Firecrawl API: missing key {e}")
-        raise FirecrawlResponseFormatError(data) from e
+        try:
+            response_url = data["data"]["metadata"]["sourceURL"]
+            title = data["data"]["metadata"].get("title")
+            content = data["data"][response_format]
+        except KeyError as e:
+            logger.error("Malformed response from Firecrawl API: missing key %s", e)
+            raise PermanentFirecrawlError(data) from e
 
-    if len(content) == 0:
-        raise FirecrawlResponseFormatError("Empty content returned")
+        if len(content) == 0:
+            raise TransientFirecrawlError("Empty content returned")
+    except FirecrawlResponseFormatError:
+        # Don't let a retry (or the next run) be served the same bad response
+        await discard_cached("v1/scrape", payload)
+        raise
 
     # Handle title being a list (Firecrawl bug)
     if isinstance(title, list):
@@ -148,6 +300,73 @@ async def scrape(
 
 
 
+def _standard_payload(url: str, full_page: bool, include_dom: bool) -> ScrapePayload:
+    """Request body for a standard/DOM-mode screenshot (before any actions)."""
+    formats = ["screenshot@fullPage" if full_page else "screenshot"]
+    if include_dom:
+        formats.append("rawHtml")
+    return {**_DEFAULTS, "url": url, "formats": formats}
+
+
+def has_fresh_screenshot(url: str, *, full_page: bool = True, include_dom: bool = False) -> bool:
+    """Whether ``screenshot(url, ...)`` (without actions) would be served from the cache."""
+    ttl = settings.SCRAPE_CACHE_TTL_SEC
+    if ttl <= 0:
+        return False
+    cached = _response_cache.get(_cache_key("v1/scrape", _standard_payload(url, full_page, include_dom)))
+    return cached is not None and time.monotonic() - cached[0] < ttl
+
+
+def _parse_focused(data: Dict[str, Any]) -> FocusedResult:
+    """Parse a focus-mode (actions) scrape response."""
+    try:
+        action_data = data["data"]["actions"]
+        focused_screenshot_url = action_data["screenshots"][0]
+        focused_html = action_data["scrapes"][0]["html"]
+    except (KeyError, IndexError) as e:
+        raise PermanentFirecrawlError(f"Could not parse focus mode response: {e}") from e
+
+    if not focused_screenshot_url or not focused_html:
+        # The element may simply not have rendered yet
+        raise TransientFirecrawlError("Missing screenshot or HTML in action response")
+
+    return FocusedResult(
+        screenshot_url=focused_screenshot_url,
+        html_content=focused_html
+    )
+
+
+def _parse_standard(
+    data: Dict[str, Any], include_dom: bool
+) -> Union[ScreenshotResult, ScreenshotAndDOMResult]:
+    """Parse a standard (optionally DOM-including) screenshot response."""
+    try:
+        source_url = data["data"]["metadata"]["sourceURL"]
+        title = data["data"]["metadata"].get("title", "")
+        screenshot_url = data["data"]["screenshot"]
+    except KeyError as e:
+        raise PermanentFirecrawlError(f"Missing expected key in standard response: {e}") from e
+
+    if not isinstance(screenshot_url, str) or not screenshot_url.startswith("https://"):
+        raise PermanentFirecrawlError(f"Invalid screenshot URL: {screenshot_url}")
+
+    if include_dom:
+        dom = data["data"].get("rawHtml")
+        if not isinstance(dom, str) or not dom:
+            raise TransientFirecrawlError("Requested DOM but got invalid content.")
+        return ScreenshotAndDOMResult(
+            url=source_url,
+            title=title,
+            screenshot_url=screenshot_url,
+            dom=dom
+        )
+    return ScreenshotResult(
+        url=source_url,
+        title=title,
+        screenshot_url=screenshot_url
+    )
+
+
 @overload
 async def screenshot(
     url: str,
@@ -200,9 +419,10 @@ async def screenshot(
 
 
 @retry(
-    retry=retry_if_exception_type(FirecrawlResponseFormatError),
+    retry=retry_if_exception_type(TransientFirecrawlError),
     reraise=True,
     stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=1, max=4) + wait_random(0, 1),
 )
 async def screenshot(
     url: str,
@@ -221,53 +441,35 @@ async def screenshot(
     - Focus Mode (selector="..."): Scrolls to an element, takes a viewport
       screenshot, and extracts the element's HTML. Returns FocusedResult.
     """
+    payload: ScrapePayload
+
     # FOCUS MODE: If a selector is provided
     if selector:
-        logger.info(f"Executing focus mode: scrolling to '{selector}' on {url}")
-        actions = initial_actions or []
-        actions += [
+        logger.info("Executing focus mode: scrolling to '%s' on %s", selector, url)
+        # Build a new list so retries don't keep appending to the caller's actions
+        actions = [
+            *(initial_actions or []),
             {"type": "wait", "milliseconds": 3000},
             {"type": "scroll", "selector": selector},
             {"type": "screenshot"},
             {"type": "scrape", "selector": selector},
         ]
 
-        payload = {
-            **default_scrape_payload(),
-            "url": url,
-            "actions": actions,
-            "formats": [],
-        }
+        payload = {**_DEFAULTS, "url": url, "actions": actions, "formats": []}
 
         data = await call_firecrawl("v1/scrape", payload)
 
         try:
-            action_data = data["data"]["actions"]
-            focused_screenshot_url = action_data["screenshots"][0]
-            focused_html = action_data["scrapes"][0]["html"]
-
-            if not focused_screenshot_url or not focused_html:
-                raise KeyError("Missing screenshot or HTML in action response")
-
-            return FocusedResult(
-                screenshot_url=focused_screenshot_url,
-                html_content=focused_html
-            )
-        except (KeyError, IndexError) as e:
-            raise FirecrawlResponseFormatError(f"Could not parse focus mode response: {e}") from e
+            return _parse_focused(data)
+        except FirecrawlResponseFormatError:
+            # Don't let a retry (or the next run) be served the same bad response
+            await discard_cached("v1/scrape", payload)
+            raise
 
     # STANDARD & DOM MODES
     else:
-        logger.info(f"Executing standard screenshot (include_dom={include_dom}) for {url}")
-        formats = ["screenshot@fullPage" if full_page else "screenshot"]
-        if include_dom:
-            formats.append("rawHtml")
-
-        payload = {
-            **default_scrape_payload(),
-            "url": url,
-            "formats": formats
-        }
+        logger.info("Executing standard screenshot (include_dom=%s) for %s", include_dom, url)
+        payload = _standard_payload(url, full_page, include_dom)
 
         if initial_actions:
             payload["actions"] = initial_actions
@@ -275,28 +477,89 @@ async def screenshot(
         data = await call_firecrawl("v1/scrape", payload)
 
         try:
-            source_url = data["data"]["metadata"]["sourceURL"]
-            title = data["data"]["metadata"].get("title", "")
-            screenshot_url = data["data"]["screenshot"]
-
-            if not isinstance(screenshot_url, str) or not screenshot_url.startswith("https://"):
-                raise FirecrawlResponseFormatError(f"Invalid screenshot URL: {screenshot_url}")
-
-            if include_dom:
-                dom = data["data"].get("rawHtml")
-                if not isinstance(dom, str) or not dom:
-                    raise FirecrawlResponseFormatError("Requested DOM but got invalid content.")
-                return ScreenshotAndDOMResult(
-                    url=source_url,
-                    title=title,
-                    screenshot_url=screenshot_url,
-                    dom=dom
-                )
-            else:
-                return ScreenshotResult(
-                    url=source_url,
-                    title=title,
-                    screenshot_url=screenshot_url
-                )
-        except KeyError as e:
-            raise FirecrawlResponseFormatError(f"Missing expected key in standard response: {e}") from e
+            return _parse_standard(data, include_dom)
+        except FirecrawlResponseFormatError:
+            # Don't let a retry (or the next run) be served the same bad response
+            await discard_cached("v1/scrape", payload)
+            raise
+
+
+async def _batch_scrape(payload: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """Run a Firecrawl batch scrape job and return every page's data."""
+    job = await _post_firecrawl("v1/batch/scrape", payload)
+    try:
+        job_path = f"v1/batch/scrape/{job['id']}"
+    except KeyError as e:
+        raise PermanentFirecrawlError(f"Batch scrape did not return a job id: {job}") from e
+
+    deadline = time.monotonic() + settings.SCREENSHOT_TIMEOUT_SEC
+    while True:
+        status = await _get_firecrawl(job_path)
+        if status.get("status") == "completed":
+            break
+        if status.get("status") == "failed":
+            raise PermanentFirecrawlError(f"Batch scrape {job['id']} failed")
+        if time.monotonic() > deadline:
+            raise TransientFirecrawlError(f"Batch scrape {job['id']} timed out")
+        await asyncio.sleep(BATCH_POLL_INTERVAL_SEC)
+
+    pages: List[Dict[str, Any]] = list(status.get("data") or [])
+    while status.get("next"):
+        status = await _get_firecrawl(status["next"])
+        pages.extend(status.get("data") or [])
+    return pages
+
+
+async def screenshot_bulk(
+    urls: List[str],
+    *,
+    full_page: bool = True,
+    include_dom: bool = False,
+) -> Dict[str, Union[ScreenshotResult, ScreenshotAndDOMResult]]:
+    """
+    Screenshot many pages with one Firecrawl batch job.
+
+    Each page that passes the same checks as a single ``screenshot(url,
+    full_page=..., include_dom=...)`` call is stored in the response cache
+    under that call's key, so later per-page calls are served from memory.
+    Returns the parsed results by URL; pages that failed are left out (and
+    not cached), so their extractors fetch them again. Pages that already
+    have a fresh cached response are not resubmitted (and not returned).
+    Does nothing when caching is disabled.
+    """
+    results: Dict[str, Union[ScreenshotResult, ScreenshotAndDOMResult]] = {}
+    if settings.SCRAPE_CACHE_TTL_SEC <= 0:
+        # Nowhere to keep the batch results; let callers scrape page by page
+        return results
+
+    urls = [
+        url for url in urls
+        if not has_fresh_screenshot(url, full_page=full_page, include_dom=include_dom)
+    ]
+    if not urls:
+        return results
+
+    formats = ["screenshot@fullPage" if full_page else "screenshot"]
+    if include_dom:
+        formats.append("rawHtml")
+
+    pages = await _batch_scrape({**_DEFAULTS, "urls": urls, "formats": formats})
+
+    now = time.monotonic()
+    async with _response_cache_lock:
+        _prune_expired_locked(now)
+        for page in pages:
+            source_url = page.get("metadata", {}).get("sourceURL")
+            if source_url not in urls:
+                continue
+            data = {"success": True, "data": page}
+            try:
+                results[source_url] = _parse_standard(data, include_dom)
+            except FirecrawlResponseFormatError as e:
+                logger.warning("Batch scrape returned an unusable page for %s: %s", source_url, e)
+                continue
+            payload = _standard_payload(source_url, full_page, include_dom)
+            _response_cache[_cache_key("v1/scrape", payload)] = (now, data)
+
+    logger.info("Batch scrape cached %d/%d pages", len(results), len(urls))
+    return results
@@ -1,13 +1,15 @@
 """Gemini AI integration for content analysis and processing."""
 
+import asyncio
 import base64
-import json
-from typing import Any, Dict, List, Literal, Optional, TypeVar, Union, cast, overload
+import functools
+from typing import Any, Dict, List, Literal, Optional, TypeVar, Union, overload
 
 import httpx
+import orjson
 from google import genai
 from google.genai import types
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, ValidationError, create_model
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_fixed
 
 from app.config import settings
@@ -18,9 +20,25 @@ logger = get_logger(__name__)
 DEFAULT_MODEL: str = "gemini-2.5-flash-preview-05-20"
 GENAI_RETRIES = 3
 GENAI_BACKOFF = 2
+GENAI_MAX_CONNECTIONS = 64
 
-# Initialize Gemini client
-_client = genai.Client(api_key=settings.GEMINI_API_KEY)
+# Initialize Gemini client. The SDK keeps one httpx client for its lifetime;
+# HTTP/2 lets concurrent extractions multiplex over a single connection.
+_client = genai.Client(
+    api_key=settings.GEMINI_API_KEY,
+    http_options=types.HttpOptions(
+        async_client_args={
+            "http2": True,
+            "limits": httpx.Limits(
+                max_connections=GENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=GENAI_MAX_CONNECTIONS,
+            ),
+        },
+    ),
+)
+
+# Shared client for downloading image sources, opened in the app lifespan.
+_http: Optional[httpx.AsyncClient] = None
 
 # Retry decorator for Gemini API calls
 genai_retry = retry(
@@ -32,26 +50,104 @@ genai_retry = retry(
 
 P = TypeVar("P", bound=BaseModel)
 
+# An image given as a URL, data URI, bare base64 string, or raw bytes
+ImageSource = Union[str, bytes]
 
-def _normalize_images(images: List[str]) -> List[str]:
+
+def _normalize_images(images: Union[ImageSource, List[ImageSource]]) -> List[ImageSource]:
     """Normalize image inputs to a consistent format."""
     if not images:
         return []
     return images if isinstance(images, list) else [images]
 
 
-async def _bytes_from_source(src: str) -> bytes:
-    """Get bytes from image source (URL or data URI)."""
+def _get_http() -> httpx.AsyncClient:
+    """Return the shared image download client, creating it on first use."""
+    global _http
+    if _http is None:
+        _http = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(30),
+            limits=httpx.Limits(max_keepalive_connections=16),
+        )
+    return _http
+
+
+async def startup() -> None:
+    """Open the shared image download client."""
+    _get_http()
+
+
+async def shutdown() -> None:
+    """Close the shared image download client."""
+    global _http
+    if _http is not None:
+        await _http.aclose()
+        _http = None
+
+
+async def _bytes_from_source(src: ImageSource) -> bytes:
+    """Get bytes from image source (raw bytes, URL or data URI)."""
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        return bytes(src)
     if src.startswith("http"):
-        async with httpx.AsyncClient() as client:
-            response = await client.get(src)
-            response.raise_for_status()
-            return response.content
+        response = await _get_http().get(src)
+        response.raise_for_status()
+        return response.content
     if src.startswith("data:"):
-        src = src.split(",", 1)[1]
+        return base64.b64decode(src[src.index(",") + 1:])
     return base64.b64decode(src)
 
 
+def _sniff_mime(data: bytes) -> str:
+    """Detect an image MIME type from its magic bytes."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if data[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    return "application/octet-stream"
+
+
+# Gemini response schemas, converted once per pydantic model
+_SCHEMA_CACHE: Dict[type[BaseModel], types.Schema] = {}
+
+
+def _schema_for(pydantic_model: type[BaseModel]) -> types.Schema:
+    """Return the cached Gemini Schema for a pydantic model."""
+    schema = _SCHEMA_CACHE.get(pydantic_model)
+    if schema is None:
+        schema = types.Schema.from_json_schema(
+            json_schema=types.JSONSchema(**pydantic_model.model_json_schema()),
+            api_option="GEMINI_API",
+        )
+        # Keep the model's field order so output matches the declared layout.
+        schema.property_ordering = list(pydantic_model.model_fields)
+        _SCHEMA_CACHE[pydantic_model] = schema
+    return schema
+
+
+@functools.lru_cache(maxsize=64)
+def _config_for(
+    pydantic_model: Optional[type[BaseModel]],
+    response_as_json: bool,
+    temperature: float,
+) -> types.GenerateContentConfig:
+    """Build (once per combination) the generation config for a call."""
+    cfg_kwargs: Dict[str, Any] = {"temperature": temperature}
+
+    if pydantic_model is not None:
+        cfg_kwargs["response_mime_type"] = "application/json"
+        cfg_kwargs["response_schema"] = _schema_for(pydantic_model)
+    elif response_as_json:
+        cfg_kwargs["response_mime_type"] = "application/json"
+
+    return types.GenerateContentConfig(**cfg_kwargs)
+
+
 # Overloads for call_gemini function
 @overload
 async def call_gemini(
@@ -61,7 +157,7 @@ async def call_gemini(
     pydantic_model: None = None,
     response_as_json: Literal[False] = False,
     temperature: float = 0.7,
-    images: Union[str, List[str], None] = None,
+    images: Union[ImageSource, List[ImageSource], None] = None,
 ) -> str: ...
 
 @overload
@@ -72,7 +168,7 @@ async def call_gemini(
     pydantic_model: None = None,
     response_as_json: Literal[True],
     temperature: float = 0.7,
-    images: Union[str, List[str], None] = None,
+    images: Union[ImageSource, List[ImageSource], None] = None,
 ) -> Dict[str, Any]: ...
 
 @overload
@@ -83,11 +179,10 @@ async def call_gemini(
     pydantic_model: type[P],
     response_as_json: Literal[False] = False,
     temperature: float = 0.7,
-    images: Union[str, List[str], None] = None,
+    images: Union[ImageSource, List[ImageSource], None] = None,
 ) -> P: ...
 
 
-@genai_retry
 async def call_gemini(
     prompt: Union[str, List[str]],
     *,
@@ -95,7 +190,7 @@ async def call_gemini(
     pydantic_model: Optional[type[P]] = None,
     response_as_json: bool = False,
     temperature: float = 0.7,
-    images: Union[str, List[str], None] = None,
+    images: Union[ImageSource, List[ImageSource], None] = None,
 ) -> Union[str, Dict[str, Any], P]:
     """
     Call the Gemini AI API with text and optional images.
@@ -106,12 +201,12 @@ async def call_gemini(
         pydantic_model: Optional Pydantic model for structured output
         response_as_json: Whether to return JSON response
         temperature: Sampling temperature (0.0 to 1.0)
-        images: Optional image URLs or data URIs
+        images: Optional image URLs, data URIs or raw image bytes
         
     Returns:
         String response, JSON dict, or Pydantic model instance
     """
-    logger.info(f"Calling Gemini API with model: {model}")
+    logger.info("Calling Gemini API with model: %s", model)
     
     # Build a list of Part objects
     parts: List[types.Part] = []
@@ -122,27 +217,38 @@ async def call_gemini(
     else:
         parts.append(types.Part.from_text(text=prompt))
     
-    # Add image parts
-    for img in _normalize_images(images or []):
-        try:
-            raw = await _bytes_from_source(img)
-            parts.append(types.Part.from_bytes(data=raw, mime_type="image/jpeg"))
-        except Exception as e:
-            logger.warning(f"Failed to load image {img}: {e}")
+    # Add image parts, fetching all sources concurrently. This happens once,
+    # outside the retry loop, so a failed generation doesn't re-download them.
+    imgs = _normalize_images(images or [])
+    raw_list = await asyncio.gather(
+        *(_bytes_from_source(img) for img in imgs), return_exceptions=True
+    )
+    for img, raw in zip(imgs, raw_list):
+        if isinstance(raw, BaseException):
+            logger.warning(
+                "Failed to load image %s: %s",
+                img if isinstance(img, str) else f"<{len(img)} bytes>",
+                raw,
+            )
             continue
+        parts.append(types.Part.from_bytes(data=raw, mime_type=_sniff_mime(raw)))
 
-    # Build config
-    cfg_kwargs: Dict[str, Any] = {"temperature": temperature}
-    
-    if pydantic_model is not None:
-        cfg_kwargs["response_mime_type"] = "application/json"
-        cfg_kwargs["response_schema"] = cast(Any, pydantic_model)
-    elif response_as_json:
-        cfg_kwargs["response_mime_type"] = "application/json"
-    
-    config = types.GenerateContentConfig(**cfg_kwargs)
+    # Reuse a cached config; temperature is rounded so it makes a stable key
+    config = _config_for(pydantic_model, response_as_json, round(temperature, 2))
     content = types.Content(parts=parts)
 
+    return await _generate(model, content, config, pydantic_model, response_as_json)
+
+
+@genai_retry
+async def _generate(
+    model: str,
+    content: types.Content,
+    config: types.GenerateContentConfig,
+    pydantic_model: Optional[type[P]],
+    response_as_json: bool,
+) -> Union[str, Dict[str, Any], P]:
+    """Send prepared content to Gemini and parse the reply, retrying on failure."""
     try:
         response = await _client.aio.models.generate_content(
             model=model,
@@ -150,28 +256,33 @@ async def call_gemini(
             config=config,
         )
     except Exception as e:
-        logger.error(f"Gemini API call failed: {e}")
+        logger.error("Gemini API call failed: %s", e)
         raise
 
-    # Handle Pydantic model response
+    # Handle Pydantic model response. With a pre-built Schema the SDK parses
+    # the JSON into a plain dict, which still needs validating into the model.
     if pydantic_model is not None:
         parsed_obj = getattr(response, "parsed", None)
+        if isinstance(parsed_obj, pydantic_model):
+            return parsed_obj
+
         if parsed_obj is not None:
-            return cast(P, parsed_obj)
+            data = parsed_obj
+        else:
+            # Only materialize the response text when the SDK couldn't parse it
+            txt = response.text
+            if not txt:
+                raise RuntimeError("Empty Gemini response")
+            try:
+                data = orjson.loads(txt)
+            except Exception as e:
+                logger.error("Bad JSON from Gemini: %s\n%s", e, txt)
+                raise RuntimeError("Invalid JSON response from Gemini") from e
         
-        txt = response.text or ""
         try:
-            data = json.loads(txt)
-        except Exception as e:
-            logger.error(f"Bad JSON from Gemini: {e}\n{txt}")
-            raise RuntimeError("Invalid JSON response from Gemini") from e
-        
-        try:
-            if hasattr(pydantic_model, "model_validate"):
-                return pydantic_model.model_validate(data)
-            return pydantic_model.parse_obj(data)
+            return pydantic_model.model_validate(data)
         except ValidationError as ve:
-            logger.error(f"Pydantic validation error: {ve}")
+            logger.error("Pydantic validation error: %s", ve)
             raise RuntimeError("Pydantic validation error") from ve
 
     # Handle regular response
@@ -184,12 +295,52 @@ async def call_gemini(
     
     if response_as_json:
         try:
-            return json.loads(txt)
+            return orjson.loads(txt)
         except Exception as e:
-            logger.error(f"Bad JSON from Gemini: {e}\n{txt}")
+            logger.error("Bad JSON from Gemini: %s\n%s", e, txt)
             raise RuntimeError("Invalid JSON response from Gemini") from e
     
     return txt
 
 
+@functools.lru_cache(maxsize=32)
+def _batch_model(models: tuple[type[BaseModel], ...]) -> type[BaseModel]:
+    """Composite response model with one field (r1, r2, ...) per batched task."""
+    fields: Dict[str, Any] = {f"r{i}": (m, ...) for i, m in enumerate(models, start=1)}
+    return create_model("Batched", **fields)
+
+
+async def call_gemini_batch(
+    prompts: List[tuple[str, type[BaseModel]]],
+    *,
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0.7,
+    images: Union[ImageSource, List[ImageSource], None] = None,
+) -> List[BaseModel]:
+    """
+    Run several independent structured prompts in a single Gemini request.
+
+    Args:
+        prompts: (prompt, pydantic model) pairs, one per task
+        model: Gemini model to use
+        temperature: Sampling temperature (0.0 to 1.0)
+        images: Optional images shared by all tasks
+
+    Returns:
+        One model instance per task, in the same order as ``prompts``
+    """
+    batch_model = _batch_model(tuple(m for _, m in prompts))
+    parts = [
+        "Complete each of the following tasks independently. "
+        "Return the result of Task N in field rN.",
+        *(f"Task {i}: {p}" for i, (p, _) in enumerate(prompts, start=1)),
+    ]
 
+    result = await call_gemini(
+        parts,
+        model=model,
+        pydantic_model=batch_model,
+        temperature=temperature,
+        images=images,
+    )
+    return [getattr(result, f"r{i}") for i in range(1, len(prompts) + 1)]
@@ -1,22 +1,41 @@
 """Logging configuration for the application."""
 
 import logging
+import logging.handlers
+import queue
 import sys
 from typing import Optional
 
+from pythonjsonlogger.json import JsonFormatter
+
 from app.config import settings
 
+# Background listener that drains queued records to the real handlers, so
+# logging calls on the event loop never block on stdout or disk.
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+
+# Set once setup_logging has run, so reloads and repeated imports don't
+# churn handlers or start extra listener threads.
+_LOGGING_CONFIGURED = False
+
 
 def setup_logging() -> None:
-    """Configure application logging based on environment."""
+    """Configure application logging based on environment (once)."""
+    global _LOGGING_CONFIGURED, _listener, _queue_handler
+    if _LOGGING_CONFIGURED:
+        return
+
     log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
     
     # Create formatter
+    formatter: logging.Formatter
     if settings.ENVIRONMENT == "production":
-        # JSON formatter for production
-        formatter = logging.Formatter(
-            fmt='{"timestamp": "%(asctime)s", "level": "%(levelname)s", "logger": "%(name)s", "message": "%(message)s"}',
-            datefmt="%Y-%m-%dT%H:%M:%S"
+        # JSON formatter for production; escapes quotes/newlines in messages
+        formatter = JsonFormatter(
+            fmt="%(asctime)s %(levelname)s %(name)s %(message)s",
+            datefmt="%Y-%m-%dT%H:%M:%S",
+            rename_fields={"asctime": "timestamp", "levelname": "level", "name": "logger"},
         )
     else:
         # Human-readable formatter for development
@@ -33,18 +52,25 @@ def setup_logging() -> None:
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
     
-    # Add console handler
+    # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level)
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    handlers: list[logging.Handler] = [console_handler]
     
-    # Add file handler if specified
+    # File handler if specified
     if settings.APP_LOGFILE and settings.ENVIRONMENT != "production":
         file_handler = logging.FileHandler(settings.APP_LOGFILE)
         file_handler.setLevel(log_level)
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    # Route records through a queue; the listener thread does the actual I/O
+    log_queue: queue.Queue[logging.LogRecord] = queue.Queue(-1)
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    root_logger.addHandler(_queue_handler)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
     
     # Set specific logger levels
     logging.getLogger("uvicorn").setLevel(logging.INFO)
@@ -56,6 +82,22 @@ def setup_logging() -> None:
         logging.getLogger("urllib3").setLevel(logging.WARNING)
         logging.getLogger("asyncio").setLevel(logging.WARNING)
 
+    _LOGGING_CONFIGURED = True
+
+
+def shutdown_logging() -> None:
+    """Flush queued log records, stop the listener thread and close its handlers."""
+    global _LOGGING_CONFIGURED, _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+    _LOGGING_CONFIGURED = False
+
 
 def get_logger(name: Optional[str] = None) -> logging.Logger:
     """Get a logger instance."""
@@ -1,18 +1,37 @@
+import asyncio
+import copy
+import hashlib
 import re
+import time
+from collections import OrderedDict
 from textwrap import dedent
-from typing import Any, Optional, cast
+from typing import Any, Awaitable, Callable, Optional, Union, cast
 from urllib.parse import quote
 
-import markdown2
-from bs4 import BeautifulSoup, Tag
+import lxml.html
+from cssselect import SelectorError
+from lxml import etree
 from pydantic import BaseModel, Field
 
-from app.firecrawl import screenshot
+from app.firecrawl import has_fresh_screenshot, screenshot, screenshot_bulk
 from app.gemini import call_gemini
 from app.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Max number of ETF extractors run at once
+EXTRACT_CONCURRENCY = 8
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# Per-page caches so an unchanged DOM skips preprocessing and selector discovery
+PREPROCESS_CACHE_SIZE = 16
+SELECTOR_CACHE_TTL_SEC = 24 * 60 * 60
+
+# Elements that never carry holdings data, dropped before the DOM goes to Gemini
+_LLM_STRIP_TAGS = ("script", "style", "svg", "noscript", "iframe", "link", "meta", etree.Comment)
+# Attributes worth keeping for selector discovery; data-* is kept separately
+_LLM_KEEP_ATTRS = frozenset({"id", "class", "role", "name", "title", "aria-label"})
+
 class BitcoinETFHoldings(BaseModel):
     etf_symbol: str
     etf_name: str
@@ -32,71 +51,219 @@ class HoldingInfoSelector(BaseModel):
     reason: str = Field(description="A brief explanation of why this selector was chosen.")
 
 
+class SelectorAndHoldings(BaseModel):
+    """Selector discovery and holdings extraction answered by one Gemini call."""
+    selector: HoldingInfoSelector
+    holdings: BitcoinETFHoldings
 
-async def find_best_selector_for_bitcoin_holdings(
-    screenshot_url: str,
-    preprocessed_dom: str,
-    etf_symbol: str,
-) -> HoldingInfoSelector:
-    logger.info(
-        "Finding best selector for %s using AI and preprocessed DOM.", etf_symbol
-    )
 
-    prompt = dedent(f"""
-        Analyze the screenshot and the accompanying simplified HTML DOM for the {etf_symbol} ETF website.
-        Your primary goal is to identify a WORKING CSS selector that isolates the main container
-        (e.g., a <div>, <table>, or <section>) displaying the Bitcoin-holdings data.
 
-        The selector MUST be effective and as simple as possible.
+_SELECTOR_PROMPT_TMPL = dedent("""
+    Analyze the screenshot and the accompanying simplified HTML DOM for the {etf_symbol} ETF website.
+    Your primary goal is to identify a WORKING CSS selector that isolates the main container
+    (e.g., a <div>, <table>, or <section>) displaying the Bitcoin-holdings data.
 
-        Prioritize these types of selectors for simplicity and robustness:
-        1. An `id` attribute if a relevant one is available (e.g., `#fundHoldingsTable`).
-        2. A single, distinctive class name that seems unique to the holdings section (e.g., `.bitcoin-data-container`).
-        3. A `data-*` attribute (e.g., `[data-testid="holdings-summary"]` or `[data-block-name="fund-details"]`).
-        4. A clear and stable tag and class combination if the above are not suitable (e.g., `table.summary-table` or `div.fund-overview-section`).
+    The selector MUST be effective and as simple as possible.
 
-        Avoid these pitfalls:
-        * Overly complex selectors: Do NOT use many chained classes, multiple chained pseudo-classes (like `:nth-of-type(N)` or `:nth-child(N)`), or deep descendant combinators (e.g., `div > div > section > div > div.someClass`).
-        * Relying on auto-generated or generic class names if more specific ones are available (e.g., avoid `.col-md-6` if there's also `.holdings-info`).
-        * Selectors that are too general and could match multiple parts of the page.
+    Prioritize these types of selectors for simplicity and robustness:
+    1. An `id` attribute if a relevant one is available (e.g., `#fundHoldingsTable`).
+    2. A single, distinctive class name that seems unique to the holdings section (e.g., `.bitcoin-data-container`).
+    3. A `data-*` attribute (e.g., `[data-testid="holdings-summary"]` or `[data-block-name="fund-details"]`).
+    4. A clear and stable tag and class combination if the above are not suitable (e.g., `table.summary-table` or `div.fund-overview-section`).
 
-        The selector needs to pinpoint the specific area containing the Bitcoin holdings data as seen in the screenshot.
-        The provided HTML has been pre-processed. Focus on the structural tags that best match the visual data block in the screenshot.
+    Avoid these pitfalls:
+    * Overly complex selectors: Do NOT use many chained classes, multiple chained pseudo-classes (like `:nth-of-type(N)` or `:nth-child(N)`), or deep descendant combinators (e.g., `div > div > section > div > div.someClass`).
+    * Relying on auto-generated or generic class names if more specific ones are available (e.g., avoid `.col-md-6` if there's also `.holdings-info`).
+    * Selectors that are too general and could match multiple parts of the page.
 
-        Simplified HTML DOM:
-        ```html
-        {preprocessed_dom}
-        ```
-    """).strip()
+    The selector needs to pinpoint the specific area containing the Bitcoin holdings data as seen in the screenshot.
+    The provided HTML has been pre-processed. Focus on the structural tags that best match the visual data block in the screenshot.
 
-    selector_result: HoldingInfoSelector = await call_gemini(
-        prompt=prompt,
-        pydantic_model=HoldingInfoSelector,
-        temperature=0.0,
-        images=[screenshot_url],
-    )
+    Simplified HTML DOM:
+    ```html
+    {preprocessed_dom}
+    ```
+""").strip()
+
+
+# Selectors known to isolate each ETF's holdings; these pages go straight to a
+# focused scrape, skipping the full-page fetch and AI selector discovery.
+KNOWN_SELECTORS: dict[str, str] = {
+    "EZBC": "#portfolio-holdings",
+}
+
+# Selectors that produced holdings on an earlier run, by ETF symbol. Unlike
+# _selector_cache this survives daily DOM changes (new numbers, new dates).
+_learned_selectors: dict[str, str] = {}
+
+# Parsed page tree plus its shrunk, serialized form for the prompt, so selector
+# lookups reuse the parse preprocessing already did instead of parsing again.
+_preprocess_cache: "OrderedDict[str, tuple[lxml.html.HtmlElement, str]]" = OrderedDict()
+_selector_cache: dict[tuple[str, str], tuple[float, HoldingInfoSelector]] = {}
+
+
+def _cached_selector(etf_symbol: str, dom_hash: str) -> Optional[HoldingInfoSelector]:
+    """Selector that worked for this exact page content, if still fresh."""
+    entry = _selector_cache.get((etf_symbol, dom_hash))
+    if entry is None:
+        return None
+    if time.monotonic() - entry[0] >= SELECTOR_CACHE_TTL_SEC:
+        del _selector_cache[(etf_symbol, dom_hash)]
+        return None
+    return entry[1]
+
+
+def _remember_selector(etf_symbol: str, dom_hash: str, selector: HoldingInfoSelector) -> None:
+    """Record a selector that matched the page and yielded holdings."""
+    now = time.monotonic()
+    for key, (cached_at, _) in list(_selector_cache.items()):
+        if now - cached_at >= SELECTOR_CACHE_TTL_SEC:
+            del _selector_cache[key]
+    _selector_cache[(etf_symbol, dom_hash)] = (now, selector)
+    _learned_selectors[etf_symbol] = selector.selector
+
+
+def _forget_selector(etf_symbol: str, selector: str) -> None:
+    """Drop a selector that stopped working from both selector caches."""
+    if _learned_selectors.get(etf_symbol) == selector:
+        del _learned_selectors[etf_symbol]
+    for key, (_, cached) in list(_selector_cache.items()):
+        if key[0] == etf_symbol and cached.selector == selector:
+            del _selector_cache[key]
+
+
+def _dom_hash(dom: str) -> str:
+    """Content hash used to key the per-page caches."""
+    return hashlib.blake2b(dom.encode()).hexdigest()
+
+
+def _parse_and_preprocess(dom: str) -> tuple[lxml.html.HtmlElement, str]:
+    """Parse a page once, returning the full tree and its LLM-ready HTML."""
+    tree = lxml.html.fromstring(dom)
+    # Shrink a copy: selectors must be matched against the page as the browser
+    # sees it (all attributes and nodes), as Firecrawl's focus mode does.
+    return tree, preprocess_html_for_analysis(copy.deepcopy(tree))
 
-    logger.info(
-        "AI identified selector for %s: '%s'. Reason: %s",
-        etf_symbol,
-        selector_result.selector,
-        selector_result.reason,
-    )
 
-    return selector_result
+async def _preprocess_cached(dom_hash: str, dom: str) -> tuple[lxml.html.HtmlElement, str]:
+    """_parse_and_preprocess, memoized (LRU) on the DOM's content hash."""
+    preprocessed = _preprocess_cache.get(dom_hash)
+    if preprocessed is not None:
+        _preprocess_cache.move_to_end(dom_hash)
+        return preprocessed
 
-def preprocess_html_for_analysis(html_content: str) -> str:
-    soup = BeautifulSoup(html_content, "html.parser")
+    # Parsing is CPU-bound; run it off the event loop so other ETFs keep going
+    preprocessed = await asyncio.to_thread(_parse_and_preprocess, dom)
+    _preprocess_cache[dom_hash] = preprocessed
+    if len(_preprocess_cache) > PREPROCESS_CACHE_SIZE:
+        _preprocess_cache.popitem(last=False)
+    return preprocessed
 
-    body_element = soup.find("body")
 
-    element_to_clean = cast(Tag, body_element if body_element else soup)
+def _shrink_for_llm(element: lxml.html.HtmlElement) -> None:
+    """Drop non-content nodes and attributes that don't help pick a selector, in place."""
+    # Single C-level pass; keeps the text that follows each removed element
+    etree.strip_elements(element, *_LLM_STRIP_TAGS, with_tail=False)
 
-    # Now, `element_to_clean` is correctly typed as `Tag`, so this call is valid.
-    for tag in element_to_clean.find_all(["script", "style", "svg"]):
-        tag.decompose()
+    for el in element.iter(etree.Element):
+        for name in list(el.attrib):
+            keep = name in _LLM_KEEP_ATTRS or (
+                name.startswith("data-") and not name.startswith("data-analytics")
+            )
+            if not keep:
+                del el.attrib[name]
+
+
+def preprocess_html_for_analysis(root: lxml.html.HtmlElement) -> str:
+    """Shrink a parsed page in place and serialize its body for selector discovery."""
+    body_element = root.find(".//body")
+    element_to_clean = body_element if body_element is not None else root
+
+    _shrink_for_llm(element_to_clean)
+
+    # Indentation is wasted prompt tokens; collapse whitespace instead
+    return _WHITESPACE_RE.sub(" ", lxml.html.tostring(element_to_clean, encoding="unicode"))
+
+
+_EXTRACTION_PROMPT_TMPL = dedent("""
+    Analyze the focused screenshot from the {etf_symbol} ETF website and the focused text content.
+
+    {focused_text}
 
-    return str(element_to_clean.prettify())
+    website_url: {url}
+
+    **Your task**: From this focused context, extract the data fields for the BitcoinETFHoldings model.
+
+    etf_symbol: str
+    etf_name: str
+    website_url: str
+    bitcoin_quantity: Optional[float]  # Number of Bitcoin held
+    bitcoin_quantity_unit: str  # "BTC" or "Bitcoin" etc.
+    total_net_assets: Optional[str]  # Total fund value if visible
+    as_of_date: Optional[str]  # Date of the holdings data
+    data_found: bool  # Whether Bitcoin holdings data was successfully extracted
+    notes: Optional[str]
+
+    {special_note}
+""").strip()
+
+
+_COMBINED_PROMPT_TMPL = dedent("""
+    In the same response, also extract the {etf_symbol} Bitcoin-holdings data shown in the
+    screenshot and the HTML above, using the BitcoinETFHoldings fields. Put the selector in
+    `selector` and the extracted data in `holdings`. If the holdings are not clearly visible,
+    set `holdings.data_found` to false instead of guessing.
+
+    website_url: {url}
+
+    {special_note}
+""").strip()
+
+
+def _extraction_prompt(
+    etf_symbol: str,
+    url: str,
+    focused_text: str,
+    special_instructions: Optional[str],
+) -> str:
+    """Fill the extraction prompt template for one ETF."""
+    special_note = f"Special instructions: {special_instructions}" if special_instructions else ""
+    return _EXTRACTION_PROMPT_TMPL.format(
+        etf_symbol=etf_symbol, focused_text=focused_text, url=url, special_note=special_note
+    ).strip()
+
+
+async def find_selector_and_holdings(
+    screenshot: Union[str, bytes],
+    preprocessed_dom: str,
+    etf_symbol: str,
+    url: str,
+    special_instructions: Optional[str] = None,
+) -> SelectorAndHoldings:
+    """Discover the holdings selector and extract the holdings in a single Gemini call."""
+    logger.info("Finding selector and holdings for %s in one AI call.", etf_symbol)
+
+    special_note = f"Special instructions: {special_instructions}" if special_instructions else ""
+    prompt = [
+        _SELECTOR_PROMPT_TMPL.format(etf_symbol=etf_symbol, preprocessed_dom=preprocessed_dom),
+        _COMBINED_PROMPT_TMPL.format(etf_symbol=etf_symbol, url=url, special_note=special_note).strip(),
+    ]
+
+    result: SelectorAndHoldings = await call_gemini(
+        prompt=prompt,
+        pydantic_model=SelectorAndHoldings,
+        temperature=0.0,
+        images=[screenshot],
+    )
+
+    logger.info(
+        "AI identified selector for %s: '%s' (data_found=%s). Reason: %s",
+        etf_symbol,
+        result.selector.selector,
+        result.holdings.data_found,
+        result.selector.reason,
+    )
+    return result
 
 
 async def screenshot_and_extract_bitcoin_holdings(
@@ -109,8 +276,12 @@ async def screenshot_and_extract_bitcoin_holdings(
     """
     Extracts Bitcoin ETF holdings via a robust, token-efficient, multi-stage AI process.
     recommended_selector: Optional[str] – If provided, a CSS selector that will be tried first; the function falls back to AI discovery if it fails.
+    Without one, KNOWN_SELECTORS and then the selector learned on an earlier successful run are tried.
     """
     # --- Fast‑path: use the recommended selector first -----------------------
+    recommended_selector = (
+        recommended_selector or KNOWN_SELECTORS.get(etf_symbol) or _learned_selectors.get(etf_symbol)
+    )
     if recommended_selector:
         logger.info("[Direct] Attempting focused scrape with recommended selector '%s' for %s",
                     recommended_selector, etf_symbol)
@@ -122,37 +293,12 @@ async def screenshot_and_extract_bitcoin_holdings(
                 initial_actions=initial_actions,
             )
 
-            # Extract element HTML for markdown conversion
-            page_content = await screenshot(url, include_dom=True, initial_actions=initial_actions)
-            selected_html = extract_element_by_selector(page_content.dom, recommended_selector)
-            focused_markdown = markdown2.markdown(selected_html)
-
-            logger.info("[Direct] focused_markdown length: %d", len(focused_markdown))
-
-            special_note = f"\n\nSpecial instructions: {special_instructions}" if special_instructions else ""
-            extraction_prompt = dedent(
-                f"""
-                Analyze the focused screenshot from the {etf_symbol} ETF website and the focused markdown content.
-
-                {focused_markdown}
+            # Focus mode already returns the element's HTML; no separate DOM fetch needed
+            focused_text = await asyncio.to_thread(html_to_text, focused_content.html_content)
 
-                website_url: {url}
+            logger.info("[Direct] focused_text length: %d", len(focused_text))
 
-                **Your task**: From this focused context, extract the data fields for the BitcoinETFHoldings model.
-
-                etf_symbol: str
-                etf_name: str
-                website_url: str
-                bitcoin_quantity: Optional[float]  # Number of Bitcoin held
-                bitcoin_quantity_unit: str        # "BTC" or "Bitcoin" etc.
-                total_net_assets: Optional[str]   # Total fund value if visible
-                as_of_date: Optional[str]         # Date of the holdings data
-                data_found: bool                  # Whether Bitcoin holdings data was successfully extracted
-                notes: Optional[str]
-
-                {special_note}
-                """
-            ).strip()
+            extraction_prompt = _extraction_prompt(etf_symbol, url, focused_text, special_instructions)
 
             holdings: BitcoinETFHoldings = await call_gemini(
                 prompt=extraction_prompt,
@@ -173,51 +319,71 @@ async def screenshot_and_extract_bitcoin_holdings(
 
     # ------------------------------------------------------------------------
     # If we get here, either no recommended selector or it failed
+    # Make sure the fallback runs real discovery instead of retrying the same selector
+    if recommended_selector:
+        _forget_selector(etf_symbol, recommended_selector)
+
     logger.info("[1/3] Fetching initial page content for %s from %s", etf_symbol, url)
     page_content = await screenshot(url, include_dom=True, initial_actions=initial_actions)
 
+    dom_hash = _dom_hash(page_content.dom)
+    # One parse per page, shared by selector discovery and element extraction
     logger.info("[2/3] Preprocessing DOM for %s to reduce token usage", etf_symbol)
-    preprocessed_dom = preprocess_html_for_analysis(page_content.dom)
-
-    # 2/3 – Selector discovery (AI-driven since recommended failed or wasn't provided)
-    logger.info("[2/3] Using AI to discover best selector for %s", etf_symbol)
-    selector_result = await find_best_selector_for_bitcoin_holdings(
-        screenshot_url=page_content.screenshot_url,
-        preprocessed_dom=preprocessed_dom,
-        etf_symbol=etf_symbol,
+    page_tree, preprocessed_dom = await _preprocess_cached(dom_hash, page_content.dom)
+
+    cached_selector = _cached_selector(etf_symbol, dom_hash)
+    if cached_selector is not None:
+        logger.info("[2/3] Page unchanged for %s; reusing cached selector", etf_symbol)
+        selector_result = cached_selector
+    else:
+        # 2/3 – Selector discovery and extraction from the full page in one call
+        logger.info("[2/3] Using AI to discover selector and holdings for %s", etf_symbol)
+        combined = await find_selector_and_holdings(
+            screenshot=page_content.screenshot_url,
+            preprocessed_dom=preprocessed_dom,
+            etf_symbol=etf_symbol,
+            url=url,
+            special_instructions=special_instructions,
+        )
+        if combined.holdings.data_found:
+            # Only keep the selector for later runs if it really isolates something
+            combined_html = await asyncio.to_thread(
+                extract_element_by_selector, page_tree, combined.selector.selector
+            )
+            if combined_html.strip():
+                _remember_selector(etf_symbol, dom_hash, combined.selector)
+            return combined.holdings
+
+        # Fall back to a focused pass on the selector the combined call picked
+        logger.info("[2/3] Full-page extraction found no data for %s; trying a focused scrape", etf_symbol)
+        selector_result = combined.selector
+
+    selected_html = await asyncio.to_thread(
+        extract_element_by_selector, page_tree, selector_result.selector
     )
+    if not selected_html.strip():
+        # Nothing to focus on; skip the focused scrape and the extraction call
+        logger.warning("Selector '%s' matched nothing for %s", selector_result.selector, etf_symbol)
+        _selector_cache.pop((etf_symbol, dom_hash), None)
+        return BitcoinETFHoldings(
+            etf_symbol=etf_symbol,
+            etf_name="",
+            website_url=url,
+            bitcoin_quantity=None,
+            bitcoin_quantity_unit="",
+            total_net_assets=None,
+            as_of_date=None,
+            data_found=False,
+            notes="selector did not match",
+        )
 
     logger.info("[3/3] Executing focused scrape for AI-discovered selector '%s'", selector_result.selector)
     focused_content = await screenshot(url, selector=selector_result.selector, initial_actions=initial_actions)
 
-    selected_html = extract_element_by_selector(page_content.dom, selector_result.selector)
-    focused_markdown = markdown2.markdown(selected_html)
-    logger.info("focused_markdown: %s", focused_markdown)
+    focused_text = await asyncio.to_thread(html_to_text, selected_html)
+    logger.info("focused_text: %s", focused_text)
 
-    special_note = f"\n\nSpecial instructions: {special_instructions}" if special_instructions else ""
-    extraction_prompt = dedent(
-        f"""
-        Analyze the focused screenshot from the {etf_symbol} ETF website and the focused markdown content.
-
-        {focused_markdown}
-
-        website_url: {url}
-
-        **Your task**: From this focused context, extract the data fields for the BitcoinETFHoldings model.
-
-        etf_symbol: str
-        etf_name: str
-        website_url: str
-        bitcoin_quantity: Optional[float]  # Number of Bitcoin held
-        bitcoin_quantity_unit: str  # "BTC" or "Bitcoin" etc.
-        total_net_assets: Optional[str]  # Total fund value if visible
-        as_of_date: Optional[str]  # Date of the holdings data
-        data_found: bool  # Whether Bitcoin holdings data was successfully extracted
-        notes: Optional[str]
-
-        {special_note}
-        """
-    ).strip()
+    extraction_prompt = _extraction_prompt(etf_symbol, url, focused_text, special_instructions)
 
     holdings: BitcoinETFHoldings = await call_gemini(
         prompt=extraction_prompt,
@@ -225,20 +391,60 @@ async def screenshot_and_extract_bitcoin_holdings(
         temperature=0.2,
         images=[focused_content.screenshot_url],
     )
+    if holdings.data_found:
+        _remember_selector(etf_symbol, dom_hash, selector_result)
+    else:
+        _selector_cache.pop((etf_symbol, dom_hash), None)
     return holdings
 
 
-def extract_element_by_selector(html: str, selector: str) -> str:
-    soup = BeautifulSoup(html, "html.parser")
-    selected_element = soup.select_one(selector)
-    return str(selected_element) if selected_element else ""
+def html_to_text(html: str) -> str:
+    """Visible text of an HTML fragment, whitespace-collapsed, for LLM prompts."""
+    if not html.strip():
+        return ""
+    try:
+        root = lxml.html.fromstring(html)
+    except etree.ParserError:
+        # Nothing but comments/whitespace, e.g. "<!-- x -->"
+        return ""
+    etree.strip_elements(root, "script", "style", with_tail=False)
+    return _WHITESPACE_RE.sub(" ", " ".join(root.itertext())).strip()
+
+
+def extract_element_by_selector(tree: lxml.html.HtmlElement, selector: str) -> str:
+    """HTML of the first element in ``tree`` matching a CSS selector, or "" if none."""
+    try:
+        matches = tree.cssselect(selector)
+    except SelectorError as e:
+        # Valid in browsers but unsupported by cssselect (e.g. :last-of-type on *)
+        logger.warning("Could not evaluate selector '%s': %s", selector, e)
+        return ""
+    if not matches:
+        return ""
+    # The tail is text after the element, not part of it
+    html: str = lxml.html.tostring(matches[0], encoding="unicode", with_tail=False)
+    return html
+
+
+# Pages that go straight through the standard (no selector, no actions) flow;
+# their first-stage DOM screenshots are fetched together by prefetch_pages.
+ETF_PAGE_URLS: dict[str, str] = {
+    "IBIT": "https://www.ishares.com/us/products/333011/ishares-bitcoin-trust",
+    "GBTC": "https://etfs.grayscale.com/gbtc",
+    "ARKB": "https://data.chain.link/feeds/base/base/arkb-reserves",
+    "BTC": "https://etfs.grayscale.com/btc",
+    "BITB": "https://bitbetf.com/",
+    "HODL": "https://www.vaneck.com/us/en/investments/bitcoin-etf-hodl/overview/",
+    "BRRR": "https://coinshares.com/us/etf/brrr/",
+    "DEFI": "https://hashdex-etfs.com/defi",
+}
 
 
 # Individual ETF extraction functions
 async def extract_ibit_holdings() -> BitcoinETFHoldings:
     """iShares Bitcoin Trust (IBIT)"""
     return await screenshot_and_extract_bitcoin_holdings(
-        url="https://www.ishares.com/us/products/333011/ishares-bitcoin-trust",
+        url=ETF_PAGE_URLS["IBIT"],
         etf_symbol="IBIT"
     )
 
@@ -248,18 +454,17 @@ def get_daily_params_from_dom(dom: str) -> dict:
     Parses the static DOM to find the parameters for the 'Daily Holdings' tab
     by looking inside its onclick attribute.
     """
-    soup = BeautifulSoup(dom, "html.parser")
-    # Find the table cell (td) for the Daily Holdings tab
-    daly_tab_td = soup.find('a', id='DALYTab').find_parent('td')
+    # Find the table cell (td) for the Daily Holdings tab straight from the lxml tree
+    daly_tab_tds = lxml.html.fromstring(dom).xpath("//a[@id='DALYTab']/ancestor::td[1]")
 
-    if not daly_tab_td:
+    if not daly_tab_tds:
         raise ValueError("Could not find the 'Daily Holdings' tab TD element in the DOM.")
 
-    onclick_attr = daly_tab_td.get('onclick', '')
+    onclick_attr = daly_tab_tds[0].get('onclick', '')
 
-    # Use regex to find all the string arguments passed to getDocumentMenu
+    # Quoted arguments alternate with separators, so every odd split chunk is one
     # Example: getDocumentMenu('Fidelity','MFL','DALY', 'application/pdf', ...)
-    params = re.findall(r"\'(.*?)\'", onclick_attr)
+    params = onclick_attr.split("'")[1::2]
 
     if len(params) < 15:
         raise ValueError("Could not parse enough parameters from the onclick attribute.")
@@ -332,7 +537,7 @@ async def extract_fidelity_holdings() -> BitcoinETFHoldings:
         ]
     )
 
-    logger.info(f"Screenshot result: {result}")
+    logger.info("Screenshot result: %s", result)
 
     # Extract holdings data from the screenshot
     custom_prompt = (
@@ -408,42 +613,42 @@ def extract_daily_holdings_params(html_content: str) -> dict:
 async def extract_gbtc_holdings() -> BitcoinETFHoldings:
     """Grayscale Bitcoin Trust (GBTC)"""
     return await screenshot_and_extract_bitcoin_holdings(
-        url="https://etfs.grayscale.com/gbtc",
+        url=ETF_PAGE_URLS["GBTC"],
         etf_symbol="GBTC"
     )
 
 async def extract_arkb_holdings() -> BitcoinETFHoldings:
     """ARK 21Shares Bitcoin ETF (ARKB)"""
     return await screenshot_and_extract_bitcoin_holdings(
-        url="https://data.chain.link/feeds/base/base/arkb-reserves",
+        url=ETF_PAGE_URLS["ARKB"],
         etf_symbol="ARKB"
     )
 
 async def extract_btc_mini_holdings() -> BitcoinETFHoldings:
     """Grayscale Bitcoin Mini Trust (BTC)"""
     return await screenshot_and_extract_bitcoin_holdings(
-        url="https://etfs.grayscale.com/btc",
+        url=ETF_PAGE_URLS["BTC"],
         etf_symbol="BTC"
     )
 
 async def extract_bitb_holdings() -> BitcoinETFHoldings:
     """Bitwise Bitcoin ETF (BITB)"""
     return await screenshot_and_extract_bitcoin_holdings(
-        url="https://bitbetf.com/",
+        url=ETF_PAGE_URLS["BITB"],
         etf_symbol="BITB"
     )
 
 async def extract_hodl_holdings() -> BitcoinETFHoldings:
     """VanEck Bitcoin Trust (HODL)"""
     return await screenshot_and_extract_bitcoin_holdings(
-        url="https://www.vaneck.com/us/en/investments/bitcoin-etf-hodl/overview/",
+        url=ETF_PAGE_URLS["HODL"],
         etf_symbol="HODL"
     )
 
 async def extract_brrr_holdings() -> BitcoinETFHoldings:
     """Valkyrie Bitcoin Fund (BRRR)"""
     return await screenshot_and_extract_bitcoin_holdings(
-        url="https://coinshares.com/us/etf/brrr/",
+        url=ETF_PAGE_URLS["BRRR"],
         etf_symbol="BRRR"
     )
 
@@ -460,12 +665,23 @@ async def extract_ezbc_holdings() -> BitcoinETFHoldings:
     return await screenshot_and_extract_bitcoin_holdings(
         url="https://www.franklintempleton.com/investments/options/exchange-traded-funds/products/39639/SINGLCLASS/franklin-bitcoin-etf/EZBC",
         etf_symbol="EZBC",
-        recommended_selector="#portfolio-holdings",
         initial_actions=[
-            {"type": "wait", "selector": "#portfolio-holdings"},
+            {"type": "wait", "selector": KNOWN_SELECTORS["EZBC"]},
         ]
     )
 
+_BTCW_PROMPT_TMPL = dedent("""
+    Extract the WisdomTree Bitcoin ETF (BTCW) on-screen data from the below focused holdings-table.
+    Parse the **Bitcoin quantity held, its units, total net assets if present, and the 'as of' date**.
+    Provide a very short note with any caveats (e.g. if you estimated).
+    Respond in the BitcoinETFHoldings model format.
+
+    {focused_text}
+
+    website_url: {url}
+""").strip()
+
+
 async def extract_btcw_holdings() -> BitcoinETFHoldings:
     """WisdomTree Bitcoin Fund (BTCW), manual robust extraction."""
     url = "https://www.wisdomtree.com/investments/etfs/crypto/btcw"
@@ -473,10 +689,13 @@ async def extract_btcw_holdings() -> BitcoinETFHoldings:
     selector = 'a.fund-modal-trigger[data-href*="all-current-day-holdings"]'  # Button to reveal modal
     # holdings_modal_selector = "#modalD64B125869D04E7298F97A6F45C42738"        # Modal with the table (unique to this fund/page)
 
-    # Actions: open the modal!
+    # Actions: bring the trigger into view in one step, then open the modal!
     actions = [
-        {"type": "scroll", "to": "bottom"},
-        {"type": "wait", "milliseconds": 1200},
+        {
+            "type": "executeJavascript",
+            "script": f"document.querySelector('{selector}').scrollIntoView({{block: 'center'}});",
+        },
+        {"type": "wait", "milliseconds": 800},
         {"type": "click", "selector": selector},
         {"type": "wait", "milliseconds": 3500},
     ]
@@ -484,19 +703,10 @@ async def extract_btcw_holdings() -> BitcoinETFHoldings:
     # Get the focused screenshot and html _after_ clicking
     focused_content = await screenshot(url, include_dom=True, initial_actions=actions)
 
-    # Use only the focused HTML for markdown (no need to extract by selector again)
-    focused_markdown = markdown2.markdown(focused_content.dom)
-
-    prompt = dedent(f"""
-        Extract the WisdomTree Bitcoin ETF (BTCW) on-screen data from the below focused holdings-table.
-        Parse the **Bitcoin quantity held, its units, total net assets if present, and the 'as of' date**.
-        Provide a very short note with any caveats (e.g. if you estimated).
-        Respond in the BitcoinETFHoldings model format.
+    # Use only the focused page's text (no need to extract by selector again)
+    focused_text = await asyncio.to_thread(html_to_text, focused_content.dom)
 
-        {focused_markdown}
-
-        website_url: {url}
-    """).strip()
+    prompt = _BTCW_PROMPT_TMPL.format(focused_text=focused_text, url=url)
 
     holdings: BitcoinETFHoldings = await call_gemini(
         prompt=prompt,
@@ -510,6 +720,147 @@ async def extract_btcw_holdings() -> BitcoinETFHoldings:
 async def extract_defi_holdings() -> BitcoinETFHoldings:
     """Hashdex Bitcoin ETF (DEFI)"""
     return await screenshot_and_extract_bitcoin_holdings(
-        url="https://hashdex-etfs.com/defi",
+        url=ETF_PAGE_URLS["DEFI"],
         etf_symbol="DEFI"
     )
+
+
+def _batched_pages() -> dict[str, str]:
+    """ETF_PAGE_URLS that need AI selector discovery and aren't cached yet, by symbol."""
+    # Pages with a known or learned selector start with a focused scrape instead,
+    # and pages already in the Firecrawl cache need no fetch at all
+    return {
+        symbol: url for symbol, url in ETF_PAGE_URLS.items()
+        if symbol not in KNOWN_SELECTORS
+        and symbol not in _learned_selectors
+        and not has_fresh_screenshot(url, include_dom=True)
+    }
+
+
+async def prefetch_pages(urls: list[str]) -> None:
+    """
+    Warm the Firecrawl cache for ``urls`` with one batch scrape.
+
+    Best effort: a page that fails (or the whole job failing) just means its
+    extractor fetches that page itself.
+    """
+    try:
+        await screenshot_bulk(urls, include_dom=True)
+    except Exception as e:
+        logger.warning("Batch prefetch failed, falling back to per-page scrapes: %s", e)
+
+
+# Type alias for extractor functions
+ExtractorFunction = Callable[[], Awaitable[BitcoinETFHoldings]]
+
+ALL_EXTRACTORS: tuple[ExtractorFunction, ...] = (
+    extract_ibit_holdings,
+    extract_fidelity_holdings,
+    extract_gbtc_holdings,
+    extract_arkb_holdings,
+    extract_btc_mini_holdings,
+    extract_bitb_holdings,
+    extract_hodl_holdings,
+    extract_brrr_holdings,
+    extract_ezbc_holdings,
+    extract_btcw_holdings,
+    extract_defi_holdings,
+)
+
+# Bounds how many extractors (and so Gemini calls) run at once
+_EXTRACT_SEM = asyncio.Semaphore(EXTRACT_CONCURRENCY)
+
+# Ticker handled by each extractor; used for failed placeholders and to find
+# the extractors whose pages are in a batch prefetch
+_SYMBOL_BY_FUNC: dict[ExtractorFunction, str] = {
+    extract_ibit_holdings: "IBIT",
+    extract_fidelity_holdings: "FBTC",
+    extract_gbtc_holdings: "GBTC",
+    extract_arkb_holdings: "ARKB",
+    extract_btc_mini_holdings: "BTC",
+    extract_bitb_holdings: "BITB",
+    extract_hodl_holdings: "HODL",
+    extract_brrr_holdings: "BRRR",
+    extract_ezbc_holdings: "EZBC",
+    extract_btcw_holdings: "BTCW",
+    extract_defi_holdings: "DEFI",
+}
+
+
+def _failed_result(func: ExtractorFunction, error: Exception) -> BitcoinETFHoldings:
+    """Build the placeholder result reported for an extractor that raised."""
+    return BitcoinETFHoldings(
+        etf_symbol=_SYMBOL_BY_FUNC.get(func, func.__name__),
+        etf_name="Failed to extract",
+        website_url="",
+        bitcoin_quantity=None,
+        bitcoin_quantity_unit="BTC",
+        total_net_assets=None,
+        as_of_date=None,
+        data_found=False,
+        notes=f"Extraction failed: {str(error)}"
+    )
+
+
+async def run_extractor(
+    func: ExtractorFunction,
+    prefetch: Optional["asyncio.Task[None]"] = None,
+) -> BitcoinETFHoldings:
+    """
+    Run a single extractor, turning exceptions into a failed result.
+    ``prefetch`` is the batch job fetching this extractor's page, if any.
+    """
+    try:
+        if prefetch is not None:
+            # Wait outside the semaphore so ETFs not in the batch aren't held up;
+            # shielded because the job is shared with the other batched ETFs.
+            await asyncio.shield(prefetch)
+        async with _EXTRACT_SEM:
+            result = await func()
+    except Exception as e:
+        logger.error("Extractor %s failed: %s", func.__name__, e)
+        return _failed_result(func, e)
+
+    if result.data_found and result.bitcoin_quantity is not None:
+        logger.info("Successfully extracted %s BTC for %s", result.bitcoin_quantity, result.etf_symbol)
+    else:
+        logger.warning(
+            "No bitcoin quantity found for %s, data_found=%s, bitcoin_quantity=%s",
+            result.etf_symbol,
+            result.data_found,
+            result.bitcoin_quantity,
+        )
+    return result
+
+
+def start_extractions(tg: asyncio.TaskGroup) -> list[asyncio.Task[BitcoinETFHoldings]]:
+    """
+    Start every extractor in ``tg``, one named task each, in ALL_EXTRACTORS order.
+
+    Pages still needing AI discovery are fetched by one batch job started
+    alongside; only their extractors wait for it, the rest start at once.
+    run_extractor never raises, so one failing ETF doesn't cancel its siblings.
+    """
+    batched = _batched_pages()
+    prefetch = (
+        tg.create_task(prefetch_pages(list(batched.values())), name="prefetch_pages")
+        if batched else None
+    )
+    return [
+        tg.create_task(
+            run_extractor(func, prefetch if _SYMBOL_BY_FUNC[func] in batched else None),
+            name=func.__name__,
+        )
+        for func in ALL_EXTRACTORS
+    ]
+
+
+async def extract_all_holdings() -> list[BitcoinETFHoldings]:
+    """
+    Run every ETF extractor concurrently, for callers outside the HTTP layer.
+    Results are in ALL_EXTRACTORS order; a failed extractor yields a
+    data_found=False placeholder.
+    """
+    async with asyncio.TaskGroup() as tg:
+        tasks = start_extractions(tg)
+    return [task.result() for task in tasks]
@@ -5,11 +5,12 @@ from typing import AsyncGenerator
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
+from app import firecrawl, gemini
 from app.api import router as api_router
 from app.config import settings
-from app.logger import get_logger, setup_logging
+from app.logger import get_logger, setup_logging, shutdown_logging
 
 
 @asynccontextmanager
@@ -18,21 +19,27 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # Startup
     setup_logging()
     logger = get_logger(__name__)
-    logger.info(f"Starting {settings.APP_NAME}")
-    logger.info(f"Environment: {settings.ENVIRONMENT}")
-    logger.info(f"Debug mode: {settings.DEBUG}")
-    logger.info(f"Log level: {settings.LOG_LEVEL}")
+    logger.info("Starting %s", settings.APP_NAME)
+    logger.info("Environment: %s", settings.ENVIRONMENT)
+    logger.info("Debug mode: %s", settings.DEBUG)
+    logger.info("Log level: %s", settings.LOG_LEVEL)
     
     # Validate required API keys
     if not settings.FIRECRAWL_API_KEY:
         logger.warning("FIRECRAWL_API_KEY not configured")
     if not settings.GEMINI_API_KEY:
         logger.warning("GEMINI_API_KEY not configured")
-    
+
+    await firecrawl.startup()
+    await gemini.startup()
+
     yield
     
     # Shutdown
-    logger.info(f"Shutting down {settings.APP_NAME}")
+    logger.info("Shutting down %s", settings.APP_NAME)
+    await firecrawl.shutdown()
+    await gemini.shutdown()
+    shutdown_logging()
 
 
 # Create FastAPI application
@@ -44,6 +51,7 @@ app = FastAPI(
     redoc_url="/redoc",
     lifespan=lifespan,
     debug=settings.DEBUG,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
@@ -72,14 +80,14 @@ async def root() -> dict[str, str]:
 
 
 @app.exception_handler(Exception)
-async def global_exception_handler(request: Request, exc: Exception) -> JSONResponse:
+async def global_exception_handler(request: Request, exc: Exception) -> ORJSONResponse:
     """Global exception handler."""
     logger = get_logger(__name__)
-    logger.error(f"Unhandled exception on {request.url}: {exc}", exc_info=True)
+    logger.error("Unhandled exception on %s: %s", request.url, exc, exc_info=True)
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
-        content=""
+        content={"error": "internal"}
     )
 
 
@@ -91,6 +99,7 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG,
+        loop="uvloop",
         log_level=settings.LOG_LEVEL.lower()
     )
 